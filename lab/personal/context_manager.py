@@ -10,14 +10,18 @@ This is our first experiment in building Personal AI Toolkit tools that scale
 from individual use to executive team management.
 """
 
-import json
+import atexit
 import os
-from datetime import datetime, timezone
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-from dataclasses import dataclass, asdict
+from typing import AbstractSet, Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from dataclasses import dataclass, field, replace
 from enum import Enum
+from operator import attrgetter
 
+import orjson
 from fastmcp import FastMCP, Context
 from pydantic import BaseModel, Field
 
@@ -25,12 +29,41 @@ from pydantic import BaseModel, Field
 mcp = FastMCP(
     "Personal Context Manager",
     instructions="Intelligent context management for enhanced productivity and decision-making",
-    dependencies=["fastmcp"],
+    dependencies=["fastmcp", "orjson"],
 )
 
 # Configuration
 CONTEXT_DIR = Path.home() / ".eve-mcp-lab" / "context"
 CONTEXT_DIR.mkdir(parents=True, exist_ok=True)
+COMPACT_RATIO = 4  # Compact the journal once it holds 4x more records than live contexts
+TOKEN_PATTERN = re.compile(r'\w+')
+RECORD_ID_PREFIX = b'{"id":"'  # Every journal record starts with its ID
+# Raised by records that decode but don't describe a context this version can load
+BAD_RECORD_ERRORS = (AttributeError, KeyError, TypeError, ValueError)
+# Query words shorter than this, or matching more than this fraction of the
+# store, are verified by scanning instead of going through the token index
+MIN_INDEXED_TERM_LENGTH = 3
+MAX_INDEXED_MATCH_FRACTION = 0.2
+RECENT_CACHE_SIZE = 32  # Distinct (limit, type) recent-context queries cached per epoch
+# One format call renders a whole search/recent result entry
+CONTEXT_SUMMARY_TEMPLATE = (
+    "{index}. **{title}** ({type})\n"
+    "   Priority: {priority} | Updated: {updated}\n"
+    "   Content: {content}\n"
+    "{tags}"
+)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def to_epoch_ns(dt: datetime) -> int:
+    """Convert a datetime (naive means UTC) to integer nanoseconds since the epoch"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - EPOCH) // timedelta(microseconds=1) * 1000
+
+def from_epoch_ns(ns: int) -> datetime:
+    """Convert integer nanoseconds since the epoch to an aware UTC datetime"""
+    return EPOCH + timedelta(microseconds=ns // 1000)
 
 class ContextType(str, Enum):
     """Types of context we can manage"""
@@ -48,7 +81,11 @@ class Priority(str, Enum):
     MEDIUM = "medium"
     LOW = "low"
 
-@dataclass
+# Direct value -> member maps; skips EnumMeta.__call__ for every record on load
+CONTEXT_TYPE_BY_VALUE = ContextType._value2member_map_
+PRIORITY_BY_VALUE = Priority._value2member_map_
+
+@dataclass(slots=True)
 class ContextItem:
     """A single context item with metadata"""
     id: str
@@ -56,97 +93,452 @@ class ContextItem:
     title: str
     content: str
     priority: Priority
-    created_at: datetime
-    updated_at: datetime
+    created_at_ns: int  # Unix epoch nanoseconds, UTC
+    updated_at_ns: int
     tags: List[str]
     connections: List[str]  # IDs of related context items
     metadata: Dict[str, Any]
+    # Cached values, exposed through read-only properties; the leading
+    # underscore keeps orjson from writing them to the journal.
+    # Lowercased title, content, and tags joined by NULs; one substring test covers them all
+    _search_blob: str = field(init=False, repr=False, compare=False)
+    # Display values pre-rendered for result listings
+    _updated_label: str = field(init=False, repr=False, compare=False)
+    _content_preview: str = field(init=False, repr=False, compare=False)
+    _tags_joined: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.refresh_derived_fields()
+
+    def refresh_derived_fields(self) -> None:
+        """Recompute cached search/display values after the item is mutated"""
+        self._search_blob = "\0".join([self.title, self.content, *self.tags]).lower()
+        self._updated_label = self.updated_at.strftime('%Y-%m-%d %H:%M')
+        content = self.content
+        self._content_preview = content[:100] + '...' if len(content) > 100 else content
+        self._tags_joined = ', '.join(self.tags)
+
+    @property
+    def search_blob(self) -> str:
+        """Lowercased title, content, and tags joined by NULs, for substring search"""
+        return self._search_blob
+
+    @property
+    def updated_label(self) -> str:
+        """Update time rendered for result listings"""
+        return self._updated_label
+
+    @property
+    def content_preview(self) -> str:
+        """Content truncated to 100 characters for result listings"""
+        return self._content_preview
+
+    @property
+    def tags_joined(self) -> str:
+        """Tags joined with commas for display"""
+        return self._tags_joined
+
+    @property
+    def created_at(self) -> datetime:
+        return from_epoch_ns(self.created_at_ns)
 
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary for JSON serialization"""
-        data = asdict(self)
-        data['created_at'] = self.created_at.isoformat()
-        data['updated_at'] = self.updated_at.isoformat()
-        return data
+    @property
+    def updated_at(self) -> datetime:
+        return from_epoch_ns(self.updated_at_ns)
+
+    def to_json(self) -> bytes:
+        """Serialize to a compact JSON document (orjson handles dataclasses and str enums)"""
+        return orjson.dumps(self)
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'ContextItem':
         """Create from dictionary"""
-        data['created_at'] = datetime.fromisoformat(data['created_at'])
-        data['updated_at'] = datetime.fromisoformat(data['updated_at'])
-        data['type'] = ContextType(data['type'])
-        data['priority'] = Priority(data['priority'])
+        # Records written before the switch to epoch-ns carry ISO strings
+        if 'created_at' in data:
+            data['created_at_ns'] = to_epoch_ns(datetime.fromisoformat(data.pop('created_at')))
+        if 'updated_at' in data:
+            data['updated_at_ns'] = to_epoch_ns(datetime.fromisoformat(data.pop('updated_at')))
+        data['type'] = CONTEXT_TYPE_BY_VALUE[data['type']]
+        data['priority'] = PRIORITY_BY_VALUE[data['priority']]
         return cls(**data)
 
 class ContextManager:
-    """Manages context storage and retrieval"""
+    """Manages context storage and retrieval
+
+    Contexts are persisted as an append-only JSONL journal: every add/update
+    appends one record, and deletes append a tombstone. Later records win on
+    load, and the journal is compacted once it grows well past the live set.
+    """
     
     def __init__(self):
-        self.context_file = CONTEXT_DIR / "context_store.json"
+        self.context_file = CONTEXT_DIR / "context_store.jsonl"
+        self.legacy_file = CONTEXT_DIR / "context_store.json"
         self.contexts: Dict[str, ContextItem] = {}
+        self.journal_lines = 0
+        # Append handle kept open across mutations; see flush() for durability
+        self._journal: Optional[BinaryIO] = None
+        self._journal_needs_newline = False
+        # Set when the journal holds records that couldn't be loaded; compacting
+        # would drop them, so the journal is only appended to until it is fixed
+        self._preserve_journal = False
+        # Inverted indexes: token/type/priority -> context IDs
+        self.index: Dict[str, Set[str]] = defaultdict(set)
+        self.type_index: Dict[ContextType, Set[str]] = defaultdict(set)
+        self.priority_index: Dict[Priority, Set[str]] = defaultdict(set)
+        # Bumped on every add/update/delete; cached results are keyed on it
+        self.mutation_epoch = 0
+        self._stats_cache: Optional[Tuple[int, str]] = None
+        self._recent_cache: Dict[Tuple[int, Optional[ContextType]], List[ContextItem]] = {}
         self.load_contexts()
 
     def load_contexts(self) -> None:
-        """Load contexts from disk"""
+        """Load contexts from disk and rebuild the indexes from them"""
+        # Later appends must reach the file being loaded, not a stale handle
+        self.close()
+        self.contexts = {}
+        self.journal_lines = 0
+        self._journal_needs_newline = False
+        self._preserve_journal = False
         if self.context_file.exists():
+            self._replay_journal()
+        else:
+            self._migrate_legacy_store()
+        self._rebuild_indexes()
+
+    def _replay_journal(self) -> None:
+        """Replay the journal into self.contexts"""
+        try:
+            with open(self.context_file, 'rb') as f:
+                data = f.read()
+            # Don't let the next append run on from a torn final line
+            self._journal_needs_newline = bool(data) and not data.endswith(b'\n')
+            lines = [line for line in data.splitlines() if line.strip()]
+            self.journal_lines = len(lines)
+            try:
+                self.contexts = self._replay_latest(lines)
+            except BAD_RECORD_ERRORS:
+                # A torn write from a crash, or a record this version can't
+                # read, may shadow an older good record
+                self.contexts = self._replay_all(lines)
+        except Exception as e:
+            print(f"Error loading contexts: {e}")
+            self.contexts = {}
+            self._preserve_journal = True
+            return
+        self._maybe_compact()
+
+    @staticmethod
+    def _peek_id(line: bytes) -> Optional[str]:
+        """Read a journal record's ID without decoding it, if it is a plain string"""
+        if line.startswith(RECORD_ID_PREFIX):
+            start = len(RECORD_ID_PREFIX)
+            end = line.find(b'"', start)
+            if end != -1 and b'\\' not in line[start:end]:
+                return line[start:end].decode()
+        return None
+
+    def _replay_latest(self, lines: List[bytes]) -> Dict[str, ContextItem]:
+        """Decode only the newest record per ID; superseded records are never parsed"""
+        latest: Dict[str, bytes] = {}
+        for line in lines:
+            context_id = self._peek_id(line)
+            if context_id is None:
+                context_id = orjson.loads(line)['id']
+            latest[context_id] = line
+        contexts = {}
+        for context_id, line in latest.items():
+            record = orjson.loads(line)
+            if not record.get('_deleted'):
+                contexts[context_id] = ContextItem.from_dict(record)
+        return contexts
+
+    def _replay_all(self, lines: List[bytes]) -> Dict[str, ContextItem]:
+        """Decode every record in order, skipping any that are corrupt"""
+        contexts = {}
+        for line in lines:
+            try:
+                record = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                continue  # Torn write; nothing left to recover
             try:
-                with open(self.context_file, 'r') as f:
-                    data = json.load(f)
-                    self.contexts = {
-                        ctx_id: ContextItem.from_dict(ctx_data)
-                        for ctx_id, ctx_data in data.items()
-                    }
-            except Exception as e:
-                print(f"Error loading contexts: {e}")
-                self.contexts = {}
-
-    def save_contexts(self) -> None:
-        """Save contexts to disk"""
+                if record.get('_deleted'):
+                    contexts.pop(record['id'], None)
+                else:
+                    contexts[record['id']] = ContextItem.from_dict(record)
+            except BAD_RECORD_ERRORS as e:
+                print(f"Skipping unreadable context record: {e!r}")
+                self._preserve_journal = True
+        return contexts
+
+    def _migrate_legacy_store(self) -> None:
+        """Import a pre-journal context_store.json, if one exists"""
+        if not self.legacy_file.exists():
+            return
         try:
-            data = {
-                ctx_id: ctx.to_dict()
-                for ctx_id, ctx in self.contexts.items()
-            }
-            with open(self.context_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            with open(self.legacy_file, 'rb') as f:
+                data = orjson.loads(f.read())
+            for ctx_id, ctx_data in data.items():
+                try:
+                    self.contexts[ctx_id] = ContextItem.from_dict(ctx_data)
+                except BAD_RECORD_ERRORS as e:
+                    # The legacy file is left in place, so skipped items aren't lost
+                    print(f"Skipping unreadable legacy context {ctx_id!r}: {e!r}")
+            self.compact()
         except Exception as e:
-            print(f"Error saving contexts: {e}")
+            print(f"Error migrating legacy contexts: {e}")
+            self.contexts = {}
+
+    def _journal_handle(self) -> BinaryIO:
+        """Open the journal for appending on first use"""
+        if self._journal is None:
+            self._journal = open(self.context_file, 'ab')
+            if self._journal_needs_newline:
+                self._journal.write(b'\n')
+                self._journal_needs_newline = False
+        return self._journal
+
+    def _append_record(self, record: bytes) -> None:
+        """Append a single serialized record to the journal
+
+        The record is handed to the OS immediately, so it survives a process
+        crash; fsync is batched into flush(), compaction, and shutdown.
+        """
+        try:
+            journal = self._journal_handle()
+            journal.write(record + b'\n')
+            journal.flush()
+            self.journal_lines += 1
+        except Exception as e:
+            print(f"Error saving context: {e}")
+        self._maybe_compact()
+
+    def flush(self) -> None:
+        """Force journaled writes to stable storage"""
+        if self._journal is not None:
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+
+    def close(self) -> None:
+        """Flush and release the journal handle"""
+        if self._journal is not None:
+            self.flush()
+            self._journal.close()
+            self._journal = None
+
+    def _encode_context(self, context: ContextItem) -> Optional[bytes]:
+        """Serialize a context for the journal, or None if it can't be stored"""
+        try:
+            return context.to_json()
+        except TypeError as e:
+            # e.g. orjson rejects integers beyond 64 bits
+            print(f"Error saving context: {e}")
+            return None
+
+    def compact(self) -> None:
+        """Rewrite the journal so it holds one record per live context"""
+        if self._preserve_journal:
+            print("Not compacting contexts: the journal holds records that could not be loaded")
+            return
+        tmp_file = self.context_file.with_suffix('.jsonl.tmp')
+        try:
+            with open(tmp_file, 'wb') as f:
+                for ctx in self.contexts.values():
+                    f.write(ctx.to_json() + b'\n')
+                f.flush()
+                os.fsync(f.fileno())
+            # The handle must be released before replacing the file on Windows
+            self.close()
+            os.replace(tmp_file, self.context_file)
+            self.journal_lines = len(self.contexts)
+        except Exception as e:
+            print(f"Error compacting contexts: {e}")
+
+    def _maybe_compact(self) -> None:
+        """Compact once stale records dominate the journal"""
+        if not self._preserve_journal and self.journal_lines > COMPACT_RATIO * max(len(self.contexts), 1):
+            self.compact()
+
+    @staticmethod
+    def _tokenize(context: ContextItem) -> Set[str]:
+        """Lowercased word tokens from a context's title, content, and tags"""
+        return set(TOKEN_PATTERN.findall(context.search_blob))
+
+    def _rebuild_indexes(self) -> None:
+        """Index every loaded context from scratch and drop cached results"""
+        self.index.clear()
+        self.type_index.clear()
+        self.priority_index.clear()
+        for context in self.contexts.values():
+            self._index_context(context)
+        self._mark_mutated()
+
+    def _index_context(self, context: ContextItem, previous: AbstractSet[str] = frozenset()) -> None:
+        """Add a context to the indexes, diffing against its previously indexed tokens"""
+        tokens = self._tokenize(context)
+        for token in previous - tokens:
+            self._discard_posting(token, context.id)
+        for token in tokens - previous:
+            self.index[token].add(context.id)
+        self.type_index[context.type].add(context.id)
+        # Priority can change on update, so drop any stale entry first
+        for ids in self.priority_index.values():
+            ids.discard(context.id)
+        self.priority_index[context.priority].add(context.id)
+
+    def _unindex_context(self, context: ContextItem) -> None:
+        """Remove a context from the indexes"""
+        for token in self._tokenize(context):
+            self._discard_posting(token, context.id)
+        self.type_index[context.type].discard(context.id)
+        self.priority_index[context.priority].discard(context.id)
+
+    def _discard_posting(self, token: str, context_id: str) -> None:
+        postings = self.index.get(token)
+        if postings is not None:
+            postings.discard(context_id)
+            if not postings:
+                del self.index[token]
+
+    def add_context(self, context: ContextItem) -> bool:
+        """Add a new context item, replacing any stored item with the same ID
+
+        Returns False, leaving the store untouched, if the item can't be serialized.
+        """
+        record = self._encode_context(context)
+        if record is None:
+            return False
+        replaced = self.contexts.get(context.id)
+        if replaced is not None:
+            self._unindex_context(replaced)
+        self.contexts[context.id] = context
+        self._index_context(context)
+        self._mark_mutated()
+        self._append_record(record)
+        return True
+
+    def update_context(self, context: ContextItem) -> bool:
+        """Replace an existing context item with an updated copy of it
 
-    def add_context(self, context: ContextItem) -> None:
-        """Add a new context item"""
+        The index is diffed against the stored item's tokens, so only words
+        that changed touch the postings. Returns False, leaving the store
+        untouched, if the item can't be serialized.
+        """
+        record = self._encode_context(context)
+        if record is None:
+            return False
+        previous = self.contexts[context.id]
+        if previous.type != context.type:
+            self.type_index[previous.type].discard(context.id)
         self.contexts[context.id] = context
-        self.save_contexts()
+        self._index_context(context, self._tokenize(previous))
+        self._mark_mutated()
+        self._append_record(record)
+        return True
+
+    def delete_context(self, context_id: str) -> bool:
+        """Remove a context item, recording a tombstone in the journal"""
+        context = self.contexts.pop(context_id, None)
+        if context is None:
+            return False
+        self._unindex_context(context)
+        self._mark_mutated()
+        self._append_record(orjson.dumps({"id": context_id, "_deleted": True}))
+        return True
+
+    def _mark_mutated(self) -> None:
+        """Invalidate cached query results"""
+        self.mutation_epoch += 1
+        self._recent_cache.clear()
+
+    def get_stats(self, render: Callable[['ContextManager'], str]) -> str:
+        """Rendered store statistics, re-rendered only after a mutation"""
+        if self._stats_cache is None or self._stats_cache[0] != self.mutation_epoch:
+            self._stats_cache = (self.mutation_epoch, render(self))
+        return self._stats_cache[1]
 
     def get_context(self, context_id: str) -> Optional[ContextItem]:
         """Get a context by ID"""
         return self.contexts.get(context_id)
 
-    def search_contexts(self, query: str, context_type: Optional[ContextType] = None) -> List[ContextItem]:
-        """Search contexts by content, title, or tags"""
-        results = []
+    def search_contexts(
+        self,
+        query: str,
+        context_type: Optional[ContextType] = None,
+    ) -> List[ContextItem]:
+        """Search contexts by content, title, or tags
+
+        Every whitespace-separated term of the query must appear somewhere in
+        the context; the index narrows the candidates and the search blob
+        verifies them. Results are newest first.
+        """
         query_lower = query.lower()
+        terms = query_lower.split()
         
-        for context in self.contexts.values():
-            if context_type and context.type != context_type:
+        # One pass per term: a plain substring test per item, on a shrinking set
+        matches: Iterable[ContextItem] = self._candidates(query_lower, context_type)
+        for term in terms:
+            matches = [context for context in matches if term in context.search_blob]
+        # C-level timsort beats heapq.nlargest's Python loop on large match
+        # sets, and the store is mostly in update order already
+        return sorted(matches, key=attrgetter('updated_at_ns'), reverse=True)
+
+    def _candidates(self, query_lower: str, context_type: Optional[ContextType]) -> Iterable[ContextItem]:
+        """Narrow a search to contexts whose tokens can contain the query
+
+        Every word in a matching term must appear inside some token of the
+        context, so the token vocabulary (rather than every context's text)
+        is scanned. Words too short or too common to narrow much are left to
+        the substring check, which candidates need anyway.
+        """
+        max_matches = len(self.contexts) * MAX_INDEXED_MATCH_FRACTION
+        candidates: Optional[Set[str]] = None
+        for term in set(TOKEN_PATTERN.findall(query_lower)):
+            matches = self._term_matches(term, max_matches)
+            if matches is None:
                 continue
-                
-            if (query_lower in context.title.lower() or 
-                query_lower in context.content.lower() or 
-                any(query_lower in tag.lower() for tag in context.tags)):
-                results.append(context)
-        
-        return sorted(results, key=lambda x: x.updated_at, reverse=True)
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return ()
+        if context_type:
+            type_ids = self.type_index.get(context_type, set())
+            candidates = type_ids if candidates is None else candidates & type_ids
+        if candidates is None:
+            return self.contexts.values()
+        contexts = self.contexts
+        return [contexts[context_id] for context_id in candidates if context_id in contexts]
+
+    def _term_matches(self, term: str, max_matches: float) -> Optional[Set[str]]:
+        """IDs of contexts with a token containing ``term``, or None if not selective"""
+        if len(term) < MIN_INDEXED_TERM_LENGTH:
+            return None
+        matches: Set[str] = set()
+        for token, postings in self.index.items():
+            if term in token:
+                matches |= postings
+                if len(matches) > max_matches:
+                    return None
+        return matches
 
     def get_recent_contexts(self, limit: int = 10, context_type: Optional[ContextType] = None) -> List[ContextItem]:
         """Get recent contexts"""
-        contexts = list(self.contexts.values())
-        if context_type:
-            contexts = [c for c in contexts if c.type == context_type]
-        
-        return sorted(contexts, key=lambda x: x.updated_at, reverse=True)[:limit]
+        key = (limit, context_type)
+        cached = self._recent_cache.get(key)
+        if cached is None:
+            contexts: Iterable[ContextItem] = self.contexts.values()
+            if context_type:
+                contexts = [c for c in contexts if c.type == context_type]
+            
+            # The store is mostly in update order, where timsort runs in near
+            # linear C time and heapq.nlargest hits its Python-loop worst case
+            cached = sorted(contexts, key=attrgetter('updated_at_ns'), reverse=True)[:limit]
+            if len(self._recent_cache) >= RECENT_CACHE_SIZE:
+                self._recent_cache.clear()
+            self._recent_cache[key] = cached
+        return list(cached)
 
 # Initialize the context manager
 context_manager = ContextManager()
+atexit.register(context_manager.close)
 
 @mcp.tool
 def add_context(
@@ -154,9 +546,9 @@ def add_context(
     content: str,
     context_type: ContextType = ContextType.CONVERSATION,
     priority: Priority = Priority.MEDIUM,
-    tags: List[str] = [],
-    connections: List[str] = [],
-    metadata: Dict[str, Any] = {}
+    tags: Optional[List[str]] = None,
+    connections: Optional[List[str]] = None,
+    metadata: Optional[Dict[str, Any]] = None
 ) -> str:
     """
     Add a new context item to the intelligent context store.
@@ -174,6 +566,7 @@ def add_context(
         The ID of the created context item
     """
     now = datetime.now(timezone.utc)
+    now_ns = to_epoch_ns(now)
     context_id = f"{context_type.value}_{now.strftime('%Y%m%d_%H%M%S')}"
     
     context_item = ContextItem(
@@ -182,16 +575,29 @@ def add_context(
         title=title,
         content=content,
         priority=priority,
-        created_at=now,
-        updated_at=now,
-        tags=tags,
-        connections=connections,
-        metadata=metadata
+        created_at_ns=now_ns,
+        updated_at_ns=now_ns,
+        tags=tags or [],
+        connections=connections or [],
+        metadata=metadata or {}
     )
     
-    context_manager.add_context(context_item)
+    if not context_manager.add_context(context_item):
+        return f"❌ Context '{title}' could not be saved"
     return f"✅ Context '{title}' added with ID: {context_id}"
 
+def format_context_summary(index: int, context: ContextItem) -> str:
+    """Render one entry of a search/recent listing"""
+    return CONTEXT_SUMMARY_TEMPLATE.format(
+        index=index,
+        title=context.title,
+        type=context.type.value,
+        priority=context.priority.value,
+        updated=context.updated_label,
+        content=context.content_preview,
+        tags=f"   Tags: {context.tags_joined}\n" if context.tags else "",
+    )
+
 @mcp.tool
 def search_context(
     query: str,
@@ -202,7 +608,7 @@ def search_context(
     Search through stored contexts using natural language.
     
     Args:
-        query: Search query (searches title, content, and tags)
+        query: Search query (searches title, content, and tags; all terms must match)
         context_type: Optional filter by context type
         limit: Maximum number of results to return
     
@@ -214,17 +620,8 @@ def search_context(
     if not results:
         return f"❌ No contexts found matching '{query}'"
     
-    output = [f"🔍 Found {len(results)} contexts matching '{query}':\n"]
-    
-    for i, context in enumerate(results, 1):
-        output.append(f"{i}. **{context.title}** ({context.type.value})")
-        output.append(f"   Priority: {context.priority.value} | Updated: {context.updated_at.strftime('%Y-%m-%d %H:%M')}")
-        output.append(f"   Content: {context.content[:100]}{'...' if len(context.content) > 100 else ''}")
-        if context.tags:
-            output.append(f"   Tags: {', '.join(context.tags)}")
-        output.append("")
-    
-    return "\n".join(output)
+    header = f"🔍 Found {len(results)} contexts matching '{query}':\n"
+    return "\n".join([header, *(format_context_summary(i, c) for i, c in enumerate(results, 1))])
 
 @mcp.tool
 def get_recent_context(
@@ -247,17 +644,8 @@ def get_recent_context(
         return "❌ No contexts found"
     
     type_filter = f" ({context_type.value})" if context_type else ""
-    output = [f"📋 Recent contexts{type_filter}:\n"]
-    
-    for i, context in enumerate(contexts, 1):
-        output.append(f"{i}. **{context.title}** ({context.type.value})")
-        output.append(f"   Priority: {context.priority.value} | Updated: {context.updated_at.strftime('%Y-%m-%d %H:%M')}")
-        output.append(f"   Content: {context.content[:100]}{'...' if len(context.content) > 100 else ''}")
-        if context.tags:
-            output.append(f"   Tags: {', '.join(context.tags)}")
-        output.append("")
-    
-    return "\n".join(output)
+    header = f"📋 Recent contexts{type_filter}:\n"
+    return "\n".join([header, *(format_context_summary(i, c) for i, c in enumerate(contexts, 1))])
 
 @mcp.tool
 def get_context_details(context_id: str) -> str:
@@ -283,7 +671,7 @@ def get_context_details(context_id: str) -> str:
     output.append(f"**Updated:** {context.updated_at.strftime('%Y-%m-%d %H:%M:%S UTC')}")
     
     if context.tags:
-        output.append(f"**Tags:** {', '.join(context.tags)}")
+        output.append(f"**Tags:** {context.tags_joined}")
     
     if context.connections:
         output.append(f"**Connected to:** {', '.join(context.connections)}")
@@ -327,50 +715,41 @@ def update_context(
     if not context:
         return f"❌ Context '{context_id}' not found"
     
-    # Update fields if provided
+    # Update fields if provided; the stored item is only swapped out once the copy is saved
+    changes: Dict[str, Any] = {}
     if title is not None:
-        context.title = title
+        changes['title'] = title
     if content is not None:
-        context.content = content
+        changes['content'] = content
     if priority is not None:
-        context.priority = priority
+        changes['priority'] = priority
     if tags is not None:
-        context.tags = tags
+        changes['tags'] = tags
     if connections is not None:
-        context.connections = connections
+        changes['connections'] = connections
     if metadata is not None:
-        context.metadata.update(metadata)
+        changes['metadata'] = {**context.metadata, **metadata}
     
-    context.updated_at = datetime.now(timezone.utc)
-    context_manager.save_contexts()
+    updated = replace(context, updated_at_ns=to_epoch_ns(datetime.now(timezone.utc)), **changes)
+    if not context_manager.update_context(updated):
+        return f"❌ Context '{context.title}' could not be saved"
     
-    return f"✅ Context '{context.title}' updated successfully"
+    return f"✅ Context '{updated.title}' updated successfully"
 
-@mcp.tool
-def get_context_stats() -> str:
-    """
-    Get statistics about the context store.
-    
-    Returns:
-        Formatted statistics
-    """
-    contexts = list(context_manager.contexts.values())
-    
-    if not contexts:
-        return "📊 Context store is empty"
-    
-    # Count by type
-    type_counts = {}
-    for context in contexts:
-        type_counts[context.type.value] = type_counts.get(context.type.value, 0) + 1
-    
-    # Count by priority
-    priority_counts = {}
-    for context in contexts:
-        priority_counts[context.priority.value] = priority_counts.get(context.priority.value, 0) + 1
+def format_context_stats(manager: ContextManager) -> str:
+    """Render the statistics report for a non-empty store"""
+    # Counts come straight from the type/priority indexes, no scan needed
+    type_counts = {
+        context_type.value: len(ids)
+        for context_type, ids in manager.type_index.items() if ids
+    }
+    priority_counts = {
+        priority.value: len(ids)
+        for priority, ids in manager.priority_index.items() if ids
+    }
     
     output = [f"📊 Context Store Statistics\n"]
-    output.append(f"**Total Contexts:** {len(contexts)}")
+    output.append(f"**Total Contexts:** {len(manager.contexts)}")
     output.append(f"\n**By Type:**")
     for type_name, count in sorted(type_counts.items()):
         output.append(f"  {type_name}: {count}")
@@ -380,13 +759,27 @@ def get_context_stats() -> str:
         output.append(f"  {priority_name}: {count}")
     
     # Most recent
-    recent = sorted(contexts, key=lambda x: x.updated_at, reverse=True)[:3]
+    recent = manager.get_recent_contexts(3)
     output.append(f"\n**Most Recent:**")
     for context in recent:
-        output.append(f"  {context.title} ({context.updated_at.strftime('%Y-%m-%d %H:%M')})")
+        output.append(f"  {context.title} ({context.updated_label})")
     
     return "\n".join(output)
 
+@mcp.tool
+def get_context_stats() -> str:
+    """
+    Get statistics about the context store.
+    
+    Returns:
+        Formatted statistics
+    """
+    if not context_manager.contexts:
+        return "📊 Context store is empty"
+    
+    # Reuses the last rendering until the store is mutated
+    return context_manager.get_stats(format_context_stats)
+
 if __name__ == "__main__":
     # Run the MCP server
     mcp.run() 
\ No newline at end of file
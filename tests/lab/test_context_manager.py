@@ -0,0 +1,281 @@
+"""Tests for the lab's Personal Context Manager server."""
+
+import importlib
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from fastmcp import Client
+
+pytest.importorskip("orjson")
+
+
+@pytest.fixture(scope="module")
+def cm(tmp_path_factory):
+    """The context_manager module, imported with its default store out of $HOME."""
+    home = tmp_path_factory.mktemp("home")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("HOME", str(home))
+        mp.setenv("USERPROFILE", str(home))
+        module = importlib.import_module("lab.personal.context_manager")
+    module.context_manager.close()
+    return module
+
+
+@pytest.fixture
+def store_dir(cm, tmp_path, monkeypatch):
+    monkeypatch.setattr(cm, "CONTEXT_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def manager(cm, store_dir, monkeypatch):
+    manager = cm.ContextManager()
+    monkeypatch.setattr(cm, "context_manager", manager)
+    yield manager
+    manager.close()
+
+
+def make_context(cm, context_id, title, content="", updated_at_ns=0, **kwargs):
+    return cm.ContextItem(
+        id=context_id,
+        type=kwargs.pop("type", cm.ContextType.TASK),
+        title=title,
+        content=content,
+        priority=kwargs.pop("priority", cm.Priority.MEDIUM),
+        created_at_ns=0,
+        updated_at_ns=updated_at_ns,
+        tags=kwargs.pop("tags", []),
+        connections=[],
+        metadata=kwargs.pop("metadata", {}),
+    )
+
+
+def reload(cm, manager):
+    """Close the manager and load a fresh one from the same journal."""
+    manager.close()
+    return cm.ContextManager()
+
+
+def assert_indexes_consistent(manager):
+    """The incrementally maintained indexes match ones rebuilt from scratch."""
+
+    def snapshot():
+        return [
+            {key: ids.copy() for key, ids in index.items() if ids}
+            for index in (manager.index, manager.type_index, manager.priority_index)
+        ]
+
+    incremental = snapshot()
+    manager._rebuild_indexes()
+    assert incremental == snapshot()
+
+
+def journal_lines(store_dir):
+    return (store_dir / "context_store.jsonl").read_bytes().splitlines()
+
+
+class TestJournal:
+    def test_replay_applies_updates_and_deletes(self, cm, manager):
+        manager.add_context(make_context(cm, "a", "first"))
+        manager.add_context(make_context(cm, "b", "second"))
+        manager.update_context(make_context(cm, "a", "first revised", updated_at_ns=5))
+        manager.delete_context("b")
+
+        reloaded = reload(cm, manager)
+        assert list(reloaded.contexts) == ["a"]
+        assert reloaded.contexts["a"].title == "first revised"
+        assert reloaded.contexts["a"].updated_at_ns == 5
+        reloaded.close()
+
+    def test_compaction_keeps_one_record_per_context(self, cm, manager, store_dir):
+        manager.add_context(make_context(cm, "keep", "kept"))
+        for i in range(20):
+            manager.update_context(make_context(cm, "keep", f"kept {i}"))
+
+        assert len(journal_lines(store_dir)) <= cm.COMPACT_RATIO
+        reloaded = reload(cm, manager)
+        assert reloaded.contexts["keep"].title == "kept 19"
+        reloaded.close()
+
+    def test_migrates_legacy_store(self, cm, store_dir):
+        legacy = {
+            "old": {
+                "id": "old",
+                "type": "decision",
+                "title": "Legacy",
+                "content": "from the json store",
+                "priority": "high",
+                "created_at": "2025-01-02T03:04:05.123456+00:00",
+                "updated_at": "2025-01-02T03:04:05.123456",
+                "tags": ["x"],
+                "connections": [],
+                "metadata": {},
+            }
+        }
+        (store_dir / "context_store.json").write_text(json.dumps(legacy))
+
+        manager = cm.ContextManager()
+        context = manager.contexts["old"]
+        expected = datetime(2025, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc)
+        assert context.type is cm.ContextType.DECISION
+        assert context.created_at == context.updated_at == expected
+        assert (store_dir / "context_store.jsonl").exists()
+        manager.close()
+
+        reloaded = cm.ContextManager()
+        assert reloaded.contexts["old"].created_at_ns == context.created_at_ns
+        reloaded.close()
+
+    def test_torn_final_line_is_skipped(self, cm, manager, store_dir):
+        manager.add_context(make_context(cm, "a", "alpha"))
+        manager.close()
+        with open(store_dir / "context_store.jsonl", "ab") as f:
+            f.write(b'{"id":"a","type":"task","title":"torn')
+
+        reloaded = cm.ContextManager()
+        assert reloaded.contexts["a"].title == "alpha"
+        reloaded.add_context(make_context(cm, "b", "beta"))
+
+        again = reload(cm, reloaded)
+        assert sorted(again.contexts) == ["a", "b"]
+        again.close()
+
+    def test_unreadable_record_is_skipped_and_preserved(self, cm, manager, store_dir):
+        manager.add_context(make_context(cm, "a", "alpha"))
+        manager.add_context(make_context(cm, "b", "beta"))
+        manager.close()
+        bogus = manager.contexts["b"].to_json().replace(b'"task"', b'"bogus"')
+        with open(store_dir / "context_store.jsonl", "ab") as f:
+            f.write(bogus + b"\n")
+
+        reloaded = cm.ContextManager()
+        assert sorted(reloaded.contexts) == ["a", "b"]
+        for i in range(20):
+            reloaded.update_context(make_context(cm, "a", f"alpha {i}"))
+
+        # Compaction would drop the unreadable record, so it must not run
+        assert bogus in journal_lines(store_dir)
+        again = reload(cm, reloaded)
+        assert sorted(again.contexts) == ["a", "b"]
+        again.close()
+
+    def test_unserializable_context_leaves_store_untouched(
+        self, cm, manager, store_dir
+    ):
+        manager.add_context(make_context(cm, "a", "alpha"))
+        before = journal_lines(store_dir)
+
+        too_big = {"n": 2**70}
+        assert not manager.add_context(make_context(cm, "b", "beta", metadata=too_big))
+        assert not manager.update_context(
+            make_context(cm, "a", "omega", metadata=too_big)
+        )
+
+        assert list(manager.contexts) == ["a"]
+        assert manager.contexts["a"].title == "alpha"
+        assert manager.search_contexts("omega") == []
+        assert journal_lines(store_dir) == before
+        assert_indexes_consistent(manager)
+
+
+class TestSearch:
+    def test_all_terms_must_match(self, cm, manager):
+        manager.add_context(make_context(cm, "a", "Project Alpha", "launch plan", 1))
+        manager.add_context(make_context(cm, "b", "Project Beta", "launch", 2))
+        manager.add_context(
+            make_context(cm, "c", "Notes", "misc", 3, tags=["Alpha-Launch"])
+        )
+
+        assert [c.id for c in manager.search_contexts("alpha launch")] == ["c", "a"]
+        assert [c.id for c in manager.search_contexts("LAUNCH")] == ["c", "b", "a"]
+        # Terms are substrings, not whole words
+        assert [c.id for c in manager.search_contexts("lph unc")] == ["c", "a"]
+        assert manager.search_contexts("alpha beta") == []
+
+    def test_filters_by_type(self, cm, manager):
+        manager.add_context(make_context(cm, "a", "shared word"))
+        manager.add_context(
+            make_context(cm, "b", "shared word", type=cm.ContextType.DECISION)
+        )
+
+        results = manager.search_contexts("shared", cm.ContextType.DECISION)
+        assert [c.id for c in results] == ["b"]
+
+    def test_update_and_delete_keep_index_consistent(self, cm, manager):
+        for i in range(10):
+            manager.add_context(make_context(cm, f"f{i}", f"filler {i}"))
+        manager.add_context(make_context(cm, "x", "original words", tags=["tagged"]))
+        manager.update_context(
+            make_context(cm, "x", "replacement", priority=cm.Priority.HIGH)
+        )
+        assert manager.search_contexts("original") == []
+        assert manager.search_contexts("tagged") == []
+        assert [c.id for c in manager.search_contexts("replacement")] == ["x"]
+        assert_indexes_consistent(manager)
+
+        manager.delete_context("x")
+        assert manager.search_contexts("replacement") == []
+        assert_indexes_consistent(manager)
+
+    def test_readding_an_id_replaces_its_postings(self, cm, manager):
+        for i in range(10):
+            manager.add_context(make_context(cm, f"f{i}", f"filler {i}"))
+        manager.add_context(make_context(cm, "id99", "alpha unique"))
+        manager.add_context(make_context(cm, "id99", "beta other"))
+        assert manager.search_contexts("alpha") == []
+        assert_indexes_consistent(manager)
+
+        manager.delete_context("id99")
+        assert manager.search_contexts("alpha") == []
+        assert manager.search_contexts("beta") == []
+
+
+class TestCaches:
+    def test_recent_contexts_follow_mutations(self, cm, manager):
+        manager.add_context(make_context(cm, "a", "alpha", updated_at_ns=1))
+        assert [c.id for c in manager.get_recent_contexts(5)] == ["a"]
+
+        manager.add_context(make_context(cm, "b", "beta", updated_at_ns=2))
+        assert [c.id for c in manager.get_recent_contexts(5)] == ["b", "a"]
+
+        manager.delete_context("b")
+        assert [c.id for c in manager.get_recent_contexts(5)] == ["a"]
+
+    def test_stats_follow_mutations(self, cm, manager):
+        manager.add_context(make_context(cm, "a", "alpha"))
+        first = manager.get_stats(cm.format_context_stats)
+        assert "**Total Contexts:** 1" in first
+        assert manager.get_stats(cm.format_context_stats) is first
+
+        manager.add_context(make_context(cm, "b", "beta"))
+        assert "**Total Contexts:** 2" in manager.get_stats(cm.format_context_stats)
+
+
+class TestTools:
+    async def test_add_update_and_search(self, cm, manager):
+        async with Client(cm.mcp) as client:
+            result = await client.call_tool_mcp(
+                "add_context", {"title": "Roadmap", "content": "ship the index"}
+            )
+            assert "added with ID" in result.content[0].text  # type: ignore[attr-defined]
+            (context_id,) = manager.contexts
+
+            await client.call_tool_mcp(
+                "update_context", {"context_id": context_id, "title": "Plan"}
+            )
+            result = await client.call_tool_mcp("search_context", {"query": "plan"})
+            assert "**Plan**" in result.content[0].text  # type: ignore[attr-defined]
+
+            result = await client.call_tool_mcp("search_context", {"query": "roadmap"})
+            assert result.content[0].text.startswith("❌")  # type: ignore[attr-defined]
+
+    async def test_add_rejects_unserializable_metadata(self, cm, manager):
+        async with Client(cm.mcp) as client:
+            result = await client.call_tool_mcp(
+                "add_context",
+                {"title": "Big", "content": "n", "metadata": {"n": 2**70}},
+            )
+            assert "could not be saved" in result.content[0].text  # type: ignore[attr-defined]
+        assert manager.contexts == {}